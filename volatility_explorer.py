@@ -2,406 +2,632 @@
 Volatility explorer – prices vs. rolling-returns σ
 """
 
+import base64
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
 from time import time
 
+import requests_cache
 import yfinance as yf
 
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
 import numpy as np
+from numba import njit
 import dash
 from dash import dcc, Input, Output, State, callback, no_update
 from dash.html import Div, H2, Hr, Label, Strong, P, A, I
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-from plotly.subplots import make_subplots
+
+# orjson serializes the large numeric trace arrays several times faster
+# than the stdlib json encoder
+pio.json.config.default_engine = "orjson"
+
+# Resolved once: the named template only exists on the Python side, so the
+# hand-built figure dicts must embed the actual template object
+_PLOTLY_DARK = pio.templates["plotly_dark"].to_plotly_json()
+
+# Four equal rows, top to bottom, with make_subplots-style vertical spacing
+_N_ROWS = 4
+_V_SPACE = 0.05
+_ROW_H = (1 - (_N_ROWS - 1) * _V_SPACE) / _N_ROWS
+_ROW_DOMAINS = {
+    row: (
+        (_N_ROWS - row) * (_ROW_H + _V_SPACE),
+        (_N_ROWS - row) * (_ROW_H + _V_SPACE) + _ROW_H,
+    )
+    for row in range(1, _N_ROWS + 1)
+}
 
 DEFAULT_WINDOW = 21
 DEFAULT_TICKER = "SPY"
 DEFAULT_END_DATE = datetime.now()
 DEFAULT_START_DATE = DEFAULT_END_DATE - timedelta(days=365)
 
+CACHE_DIR = Path(".cache")
+CACHE_DIR.mkdir(exist_ok=True)
+CACHE_TTL_SECONDS = 3600
+
+# Cache the Yahoo Finance HTTP responses themselves on top of the snapshots
+_yf_session = requests_cache.CachedSession(
+    str(CACHE_DIR / "yf_http"), expire_after=CACHE_TTL_SECONDS
+)
+
+
+@njit(cache=True)
+def _expanding_std(x):
+    """Expanding sample std in one Welford pass, skipping NaNs."""
+    n = x.size
+    out = np.empty(n)
+    mean = 0.0
+    m2 = 0.0
+    count = 0
+    for i in range(n):
+        v = x[i]
+        if not np.isnan(v):
+            count += 1
+            delta = v - mean
+            mean += delta / count
+            m2 += delta * (v - mean)
+        out[i] = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+    return out
+
+
+@njit(cache=True)
+def _quantile_sorted(a, q):
+    """Linear-interpolated quantile of an ascending array."""
+    n = a.size
+    if n == 1:
+        return a[0]
+    pos_f = q * (n - 1)
+    lo = int(pos_f)
+    frac = pos_f - lo
+    if lo + 1 < n:
+        return a[lo] + frac * (a[lo + 1] - a[lo])
+    return a[lo]
+
+
+@njit(cache=True)
+def _fused_rolling_stats(r, w):
+    """One-sided rolling std and IQR: one traversal and one sort per window.
+
+    Columns: std_pos, std_neg, iqr_pos, iqr_neg.
+    """
+    n = r.size
+    out = np.full((n, 4), np.nan)
+    for i in range(w - 1, n):
+        win = r[i - w + 1 : i + 1]
+        pos = win[win > 0]
+        neg = win[win < 0]
+        if pos.size >= 2:
+            mean = pos.mean()
+            ss = 0.0
+            for v in pos:
+                ss += (v - mean) ** 2
+            out[i, 0] = np.sqrt(ss / (pos.size - 1))
+            pos.sort()
+            out[i, 2] = _quantile_sorted(pos, 0.75) - _quantile_sorted(pos, 0.25)
+        if neg.size >= 2:
+            mean = neg.mean()
+            ss = 0.0
+            for v in neg:
+                ss += (v - mean) ** 2
+            out[i, 1] = np.sqrt(ss / (neg.size - 1))
+            neg.sort()
+            out[i, 3] = _quantile_sorted(neg, 0.75) - _quantile_sorted(neg, 0.25)
+    return out
+
+
+@njit(cache=True)
+def _fused_expanding_stats(r):
+    """One-sided expanding std and IQR in a single forward pass.
+
+    Std comes from Welford accumulators; IQR from insertion-sorted buffers
+    that grow with the stream. Columns: std_pos, std_neg, iqr_pos, iqr_neg.
+    """
+    n = r.size
+    out = np.full((n, 4), np.nan)
+    pos_buf = np.empty(n)
+    neg_buf = np.empty(n)
+    pos_mean = pos_m2 = 0.0
+    neg_mean = neg_m2 = 0.0
+    pos_count = neg_count = 0
+    for i in range(n):
+        v = r[i]
+        if v > 0:
+            pos_count += 1
+            delta = v - pos_mean
+            pos_mean += delta / pos_count
+            pos_m2 += delta * (v - pos_mean)
+            j = np.searchsorted(pos_buf[: pos_count - 1], v)
+            for k in range(pos_count - 1, j, -1):
+                pos_buf[k] = pos_buf[k - 1]
+            pos_buf[j] = v
+        elif v < 0:
+            neg_count += 1
+            delta = v - neg_mean
+            neg_mean += delta / neg_count
+            neg_m2 += delta * (v - neg_mean)
+            j = np.searchsorted(neg_buf[: neg_count - 1], v)
+            for k in range(neg_count - 1, j, -1):
+                neg_buf[k] = neg_buf[k - 1]
+            neg_buf[j] = v
+        if pos_count >= 2:
+            out[i, 0] = np.sqrt(pos_m2 / (pos_count - 1))
+            out[i, 2] = _quantile_sorted(
+                pos_buf[:pos_count], 0.75
+            ) - _quantile_sorted(pos_buf[:pos_count], 0.25)
+        if neg_count >= 2:
+            out[i, 1] = np.sqrt(neg_m2 / (neg_count - 1))
+            out[i, 3] = _quantile_sorted(
+                neg_buf[:neg_count], 0.75
+            ) - _quantile_sorted(neg_buf[:neg_count], 0.25)
+    return out
+
 
 def fetch_data(ticker: str, start_date: str, end_date: str):
-    """Fetch historical data for a given ticker."""
-    data = yf.Ticker(ticker).history(start=start_date, end=end_date, interval="1d")[
-        "Close"
-    ]
+    """Fetch historical data for a given ticker, serving repeats from disk."""
+    snapshot = CACHE_DIR / f"{ticker}_{start_date}_{end_date}.pkl"
+    if (
+        snapshot.exists()
+        and time() - snapshot.stat().st_mtime < CACHE_TTL_SECONDS
+    ):
+        return pd.read_pickle(snapshot)
+
+    data = yf.Ticker(ticker, session=_yf_session).history(
+        start=start_date, end=end_date, interval="1d"
+    )["Close"]
     if data.empty:
         return None
+    data.to_pickle(snapshot)
     return data
 
 
-def build_figure(ticker: str, prices, window: int) -> go.Figure:
-    """Price up + 4 σ down with shared X axis."""
-    start_time = time()
+_GLOBAL_STAT_KEYS = (
+    "global_std",
+    "global_std_pos",
+    "global_std_neg",
+    "global_iqr",
+    "global_iqr_pos",
+    "global_iqr_neg",
+)
 
-    # Daily returns
-    rets = prices.pct_change().dropna()
 
-    # Standard Deviation over window
-    window_std = rets.rolling(window).std()
-    window_std_pos = rets.rolling(window).apply(
-        lambda x: x[x > 0].std() if len(x[x > 0]) else np.nan
-    )
-    window_std_neg = rets.rolling(window).apply(
-        lambda x: x[x < 0].std() if len(x[x < 0]) else np.nan
-    )
+@lru_cache(maxsize=32)
+def _compute_stats(
+    values_bytes: bytes, index_bytes: bytes, window: int, show_expanding: bool = True
+):
+    """Compute the statistics DataFrame; cached on (prices, window)."""
+    index = pd.DatetimeIndex(np.frombuffer(index_bytes, dtype=np.int64))
+    prices = pd.Series(np.frombuffer(values_bytes, dtype=np.float64), index=index)
 
-    # Acumulated standard deviation
-    acum_std = rets.expanding().std()
-    acum_std_pos = rets.expanding().apply(
-        lambda x: x[x > 0].std() if len(x[x > 0]) else np.nan
-    )
-    acum_std_neg = rets.expanding().apply(
-        lambda x: x[x < 0].std() if len(x[x < 0]) else np.nan
-    )
+    # Daily returns, computed on the raw ndarray (single C divide, no leading
+    # NaN). float32 throughout: plenty of precision for percent returns and
+    # half the memory traffic of float64 on the rolling reductions.
+    arr = prices.to_numpy(dtype=np.float32)
+    rets = pd.Series(arr[1:] / arr[:-1] - 1.0, index=prices.index[1:])
 
-    # Global standard deviation
-    global_std = rets.std()
-    global_std_pos = rets[rets > 0].std()
-    global_std_neg = rets[rets < 0].std()
+    # Positive/negative returns masked with NaN for the global nan-aware passes
+    rets_np = rets.to_numpy()
+    pos_np = np.where(rets_np > 0, rets_np, np.nan)
+    neg_np = np.where(rets_np < 0, rets_np, np.nan)
 
-    # IQR on window
-    window_iqr = rets.rolling(window).quantile(0.75) - rets.rolling(window).quantile(
-        0.25
-    )
-    window_iqr_pos = rets.rolling(window).apply(
-        lambda x: (
-            x[x > 0].quantile(0.75) - x[x > 0].quantile(0.25)
-            if len(x[x > 0])
-            else np.nan
-        )
-    )
-    window_iqr_neg = rets.rolling(window).apply(
-        lambda x: (
-            x[x < 0].quantile(0.75) - x[x < 0].quantile(0.25)
-            if len(x[x < 0])
-            else np.nan
-        )
-    )
+    # Strided view shared by the all-returns rolling std and IQR
+    has_full_window = window <= rets_np.size
+    if has_full_window:
+        head = np.full(window - 1, np.nan)
+        view = np.lib.stride_tricks.sliding_window_view(rets_np, window)
 
-    # Acumulated IQR
-    acum_iqr_all = rets.expanding().quantile(0.75) - rets.expanding().quantile(0.25)
-    acum_iqr_pos = rets.expanding().apply(
-        lambda x: (
-            x[x > 0].quantile(0.75) - x[x > 0].quantile(0.25)
-            if len(x[x > 0])
-            else np.nan
-        )
-    )
-    acum_iqr_neg = rets.expanding().apply(
-        lambda x: (
-            x[x < 0].quantile(0.75) - x[x < 0].quantile(0.25)
-            if len(x[x < 0])
-            else np.nan
+    def _windowed(values):
+        return pd.Series(np.concatenate([head, values]), index=rets.index)
+
+    def _nan_series():
+        return pd.Series(np.nan, index=rets.index)
+
+    # All-returns rolling std and IQR from the shared strided view
+    def rolling_all_group():
+        if not has_full_window:
+            return _nan_series(), _nan_series()
+        with warnings.catch_warnings():
+            # single-value windows legitimately reduce to NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            window_std = _windowed(np.nanstd(view, axis=1, ddof=1))
+        q25, q75 = np.quantile(view, [0.25, 0.75], axis=1)
+        return window_std, _windowed(q75 - q25)
+
+    # One-sided rolling std and IQR fused into a single jitted traversal:
+    # one window walk, one sort per window, four outputs
+    def rolling_one_sided_group():
+        if not has_full_window:
+            return _nan_series(), _nan_series(), _nan_series(), _nan_series()
+        stats = _fused_rolling_stats(rets_np, window)
+        return tuple(pd.Series(stats[:, j], index=rets.index) for j in range(4))
+
+    # Acumulated all-returns stats: O(N) Welford std + expanding quantiles
+    def expanding_all_group():
+        acum_std = pd.Series(_expanding_std(rets_np), index=rets.index)
+        acum_iqr_all = rets.expanding().quantile(0.75) - rets.expanding().quantile(
+            0.25
         )
-    )
+        return acum_std, acum_iqr_all
+
+    # One-sided expanding std and IQR fused into one forward pass
+    def expanding_one_sided_group():
+        stats = _fused_expanding_stats(rets_np)
+        return tuple(pd.Series(stats[:, j], index=rets.index) for j in range(4))
+
+    # The groups are independent and the numpy/pandas/numba kernels release
+    # the GIL, so fan them out across a small thread pool. The expanding
+    # groups only run when the user asked for the accumulated curves.
+    tasks = [rolling_all_group, rolling_one_sided_group]
+    if show_expanding:
+        tasks += [expanding_all_group, expanding_one_sided_group]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(fn) for fn in tasks]
+        results = [future.result() for future in futures]
+    window_std, window_iqr = results[0]
+    window_std_pos, window_std_neg, window_iqr_pos, window_iqr_neg = results[1]
 
-    # Global IQR
-    global_iqr = rets.quantile(0.75) - rets.quantile(0.25)
-    global_iqr_pos = rets[rets > 0].quantile(0.75) - rets[rets > 0].quantile(0.25)
-    global_iqr_neg = rets[rets < 0].quantile(0.75) - rets[rets < 0].quantile(0.25)
+    # Global standard deviation / IQR, kept as scalars and drawn as hlines
+    # instead of full-length columns. With the expanding series available
+    # they are exactly its endpoints; otherwise one direct nan-aware pass.
+    if show_expanding:
+        acum_std, acum_iqr_all = results[2]
+        acum_std_pos, acum_std_neg, acum_iqr_pos, acum_iqr_neg = results[3]
+        if rets_np.size:
+            global_stats = {
+                "global_std": acum_std.iloc[-1],
+                "global_std_pos": acum_std_pos.iloc[-1],
+                "global_std_neg": acum_std_neg.iloc[-1],
+                "global_iqr": acum_iqr_all.iloc[-1],
+                "global_iqr_pos": acum_iqr_pos.iloc[-1],
+                "global_iqr_neg": acum_iqr_neg.iloc[-1],
+            }
+        else:
+            # a single price row yields no returns: every level is undefined
+            global_stats = dict.fromkeys(_GLOBAL_STAT_KEYS, np.nan)
+    elif rets_np.size:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            q25_all, q75_all = np.nanquantile(rets_np, [0.25, 0.75])
+            q25_pos, q75_pos = np.nanquantile(pos_np, [0.25, 0.75])
+            q25_neg, q75_neg = np.nanquantile(neg_np, [0.25, 0.75])
+            global_stats = {
+                "global_std": float(np.nanstd(rets_np, ddof=1)),
+                "global_std_pos": float(np.nanstd(pos_np, ddof=1)),
+                "global_std_neg": float(np.nanstd(neg_np, ddof=1)),
+                "global_iqr": float(q75_all - q25_all),
+                "global_iqr_pos": float(q75_pos - q25_pos),
+                "global_iqr_neg": float(q75_neg - q25_neg),
+            }
+    else:
+        # nanquantile of an empty array returns a scalar NaN instead of a
+        # length-2 array, so the unpacking above would raise
+        global_stats = dict.fromkeys(_GLOBAL_STAT_KEYS, np.nan)
 
-    # Single DataFrame to share axis
+    # Single DataFrame (dates on the index) backed by one contiguous float
+    # block instead of twenty separately-allocated columns
+    columns_values = [
+        ("price", arr[1:]),
+        ("rets", rets_np),
+        ("window_std", window_std),
+        ("window_std_pos", window_std_pos),
+        ("window_std_neg", window_std_neg),
+        ("window_iqr", window_iqr),
+        ("window_iqr_pos", window_iqr_pos),
+        ("window_iqr_neg", window_iqr_neg),
+    ]
+    if show_expanding:
+        columns_values += [
+            ("acum_std", acum_std),
+            ("acum_std_pos", acum_std_pos),
+            ("acum_std_neg", acum_std_neg),
+            ("acum_iqr_all", acum_iqr_all),
+            ("acum_iqr_pos", acum_iqr_pos),
+            ("acum_iqr_neg", acum_iqr_neg),
+        ]
+    buf = np.empty((rets_np.size, len(columns_values)), dtype=np.float32)
+    for j, (_, values) in enumerate(columns_values):
+        buf[:, j] = values
     df = pd.DataFrame(
-        {
-            "date": prices[1:].index,
-            "price": prices[1:],
-            "rets": rets,
-            "window_std": window_std,
-            "window_std_pos": window_std_pos,
-            "window_std_neg": window_std_neg,
-            "global_std": global_std,
-            "global_std_pos": global_std_pos,
-            "global_std_neg": global_std_neg,
-            "acum_std": acum_std,
-            "acum_std_pos": acum_std_pos,
-            "acum_std_neg": acum_std_neg,
-            "window_iqr": window_iqr,
-            "window_iqr_pos": window_iqr_pos,
-            "window_iqr_neg": window_iqr_neg,
-            "global_iqr": global_iqr,
-            "global_iqr_pos": global_iqr_pos,
-            "global_iqr_neg": global_iqr_neg,
-            "acum_iqr_all": acum_iqr_all,
-            "acum_iqr_pos": acum_iqr_pos,
-            "acum_iqr_neg": acum_iqr_neg,
-        }
+        buf, index=rets.index, columns=[name for name, _ in columns_values]
     )
+    return df, global_stats
 
-    # Subplots with shared X axis
-    fig = make_subplots(
-        rows=4,
-        cols=1,
-        shared_xaxes=True,
-        vertical_spacing=0.05,
-        subplot_titles=[
-            f"**{ticker}** – Precio de Cierre",
-            "Retornos Diarios",
-            "Desviación Estándar (Volatilidad)",
-            "Rango Intercuartil (IQR)",
-        ],
-        row_heights=[0.4, 0.4, 0.4, 0.4],
-    )
 
-    # Price
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["price"],
-            name="Precio de Cierre",
-            legendgroup="price",
-            legendgrouptitle_text="Precio",
-            hovertemplate="Precio: %{y:.2f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=1,
-        col=1,
-    )
+def build_figure(
+    ticker: str, prices, window: int, show_expanding: bool = True
+) -> dict:
+    """Price up + 4 σ down with shared X axis, as a plain figure dict."""
+    start_time = time()
 
-    # Returns
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["rets"],
-            name="Retorno %",
-            legendgroup="returns",
-            legendgrouptitle_text="Retornos",
-            hovertemplate="Retorno: %{y:.2f}%<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=2,
-        col=1,
+    # Hashable key so repeated (prices, window) requests reuse the cached stats
+    df, global_stats = _compute_stats(
+        prices.to_numpy(dtype=np.float64).tobytes(),
+        prices.index.asi8.tobytes(),
+        int(window),
+        show_expanding,
     )
 
-    # Standard Deviation
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_std"],
-            name=f"Std Todos (Ventana Móvil de {window} días)",
-            legendgrouptitle_text="Desviación Estándar",
-            hovertemplate="Std Todos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_std_pos"],
-            name=f"Std Positivos (Ventana Móvil de {window} días)",
-            line={"dash": "dash"},
-            hovertemplate="Std Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_std_neg"],
-            name=f"Std Negativos (Ventana Móvil de {window} días)",
-            line={"dash": "dash"},
-            hovertemplate="Std Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_std"],
-            name="Std Global",
-            line={"dash": "dot"},
-            hovertemplate="Std Global: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_std_pos"],
-            name="Std Global Positivos",
-            line={"dash": "dot"},
-            hovertemplate="Std Global Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_std_neg"],
-            name="Std Global Negativos",
-            line={"dash": "dot"},
-            hovertemplate="Std Global Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_std"],
-            name="Std Acumulada",
-            line={"dash": "longdash"},
-            hovertemplate="Std Acumulada: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_std_pos"],
-            name="Std Acumulada Positivos",
-            line={"dash": "longdash"},
-            hovertemplate="Std Acumulada Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_std_neg"],
-            name="Std Acumulada Negativos",
-            line={"dash": "longdash"},
-            hovertemplate="Std Acumulada Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=3,
-        col=1,
-    )
+    # Figure built as plain dicts: no per-trace schema validation from
+    # go.Scattergl / make_subplots on the hot redraw path. One shared
+    # epoch-millisecond array serves as x for every trace: integers encode
+    # far smaller than ISO strings and the date axes accept them natively.
+    x = df.index.asi8 // 10**6
 
-    # IQR
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_iqr"],
-            name=f"IQR Todos (Ventana Móvil de {window} días)",
-            line={"dash": "dot"},
-            legendgrouptitle_text="IQR",
-            hovertemplate="IQR Todos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
-        ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_iqr_pos"],
-            name=f"IQR Positivos (Ventana Móvil de {window} días)",
-            line={"dash": "dash"},
-            hovertemplate="IQR Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+    def _axis(row):
+        suffix = "" if row == 1 else str(row)
+        return f"x{suffix}", f"y{suffix}"
+
+    # (column, name, row, hovertemplate, dash, legendgroup, legendgrouptitle)
+    specs = [
+        (
+            "price",
+            "Precio de Cierre",
+            1,
+            "Precio: %{y:.2f}<br>Fecha: %{x}<extra></extra>",
+            None,
+            "price",
+            "Precio",
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["window_iqr_neg"],
-            name=f"IQR Negativos (Ventana Móvil de {window} días)",
-            line={"dash": "dash"},
-            hovertemplate="IQR Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "rets",
+            "Retorno %",
+            2,
+            "Retorno: %{y:.2f}%<br>Fecha: %{x}<extra></extra>",
+            None,
+            "returns",
+            "Retornos",
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_iqr"],
-            name="IQR Global",
-            line={"dash": "dot"},
-            hovertemplate="IQR Global: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "window_std",
+            f"Std Todos (Ventana Móvil de {window} días)",
+            3,
+            "Std Todos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            None,
+            None,
+            "Desviación Estándar",
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_iqr_pos"],
-            name="IQR Global Positivos",
-            line={"dash": "dot"},
-            hovertemplate="IQR Global Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "window_std_pos",
+            f"Std Positivos (Ventana Móvil de {window} días)",
+            3,
+            "Std Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            "dash",
+            None,
+            None,
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["global_iqr_neg"],
-            name="IQR Global Negativos",
-            line={"dash": "dot"},
-            hovertemplate="IQR Global Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "window_std_neg",
+            f"Std Negativos (Ventana Móvil de {window} días)",
+            3,
+            "Std Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            "dash",
+            None,
+            None,
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_iqr_all"],
-            name="IQR Acumulado",
-            line={"dash": "longdash"},
-            hovertemplate="IQR Acumulado: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+    ]
+    if show_expanding:
+        specs += [
+            (
+                "acum_std",
+                "Std Acumulada",
+                3,
+                "Std Acumulada: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+            (
+                "acum_std_pos",
+                "Std Acumulada Positivos",
+                3,
+                "Std Acumulada Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+            (
+                "acum_std_neg",
+                "Std Acumulada Negativos",
+                3,
+                "Std Acumulada Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+        ]
+    specs += [
+        (
+            "window_iqr",
+            f"IQR Todos (Ventana Móvil de {window} días)",
+            4,
+            "IQR Todos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            "dot",
+            None,
+            "IQR",
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_iqr_pos"],
-            name="IQR Acumulado Positivos",
-            line={"dash": "longdash"},
-            hovertemplate="IQR Acumulado Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "window_iqr_pos",
+            f"IQR Positivos (Ventana Móvil de {window} días)",
+            4,
+            "IQR Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            "dash",
+            None,
+            None,
         ),
-        row=4,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["date"],
-            y=df["acum_iqr_neg"],
-            name="IQR Acumulado Negativos",
-            line={"dash": "longdash"},
-            hovertemplate="IQR Acumulado Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+        (
+            "window_iqr_neg",
+            f"IQR Negativos (Ventana Móvil de {window} días)",
+            4,
+            "IQR Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+            "dash",
+            None,
+            None,
         ),
-        row=4,
-        col=1,
-    )
+    ]
+    if show_expanding:
+        specs += [
+            (
+                "acum_iqr_all",
+                "IQR Acumulado",
+                4,
+                "IQR Acumulado: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+            (
+                "acum_iqr_pos",
+                "IQR Acumulado Positivos",
+                4,
+                "IQR Acumulado Positivos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+            (
+                "acum_iqr_neg",
+                "IQR Acumulado Negativos",
+                4,
+                "IQR Acumulado Negativos: %{y:.4f}<br>Fecha: %{x}<extra></extra>",
+                "longdash",
+                None,
+                None,
+            ),
+        ]
+
+    traces = []
+    for column, name, row, hovertemplate, dash_style, group, group_title in specs:
+        xaxis, yaxis = _axis(row)
+        trace = {
+            "type": "scattergl",
+            "x": x,
+            "y": df[column].to_numpy(),
+            "name": name,
+            "xaxis": xaxis,
+            "yaxis": yaxis,
+            "hovertemplate": hovertemplate,
+        }
+        if dash_style:
+            trace["line"] = {"dash": dash_style}
+        if group:
+            trace["legendgroup"] = group
+        if group_title:
+            trace["legendgrouptitle"] = {"text": group_title}
+        traces.append(trace)
+
+    # Subplot titles along the top of each row's domain
+    annotations = [
+        {
+            "text": text,
+            "x": 0.5,
+            "xref": "paper",
+            "xanchor": "center",
+            "y": _ROW_DOMAINS[row][1],
+            "yref": "paper",
+            "yanchor": "bottom",
+            "showarrow": False,
+            "font": {"size": 16},
+        }
+        for row, text in enumerate(
+            [
+                f"**{ticker}** – Precio de Cierre",
+                "Retornos Diarios",
+                "Desviación Estándar (Volatilidad)",
+                "Rango Intercuartil (IQR)",
+            ],
+            1,
+        )
+    ]
+
+    # Global levels as horizontal lines: one scalar each instead of a
+    # full-length column in both the DataFrame and the JSON payload
+    shapes = []
+    for label, key, row in (
+        ("Std Global", "global_std", 3),
+        ("Std Global Positivos", "global_std_pos", 3),
+        ("Std Global Negativos", "global_std_neg", 3),
+        ("IQR Global", "global_iqr", 4),
+        ("IQR Global Positivos", "global_iqr_pos", 4),
+        ("IQR Global Negativos", "global_iqr_neg", 4),
+    ):
+        value = global_stats[key]
+        if not np.isfinite(value):
+            continue
+        _, yaxis = _axis(row)
+        shapes.append(
+            {
+                "type": "line",
+                "xref": "paper",
+                "x0": 0,
+                "x1": 1,
+                "yref": yaxis,
+                "y0": value,
+                "y1": value,
+                "line": {"dash": "dot"},
+            }
+        )
+        annotations.append(
+            {
+                "text": label,
+                "x": 0,
+                "xref": "paper",
+                "xanchor": "left",
+                "y": value,
+                "yref": yaxis,
+                "yanchor": "bottom",
+                "showarrow": False,
+            }
+        )
 
-    fig.update_layout(
-        height=1000,
-        title_text=f"Explorador de Volatilidad – {ticker} - Tiempo de cálculo: {time() - start_time:.2f} segundos",
-        template="plotly_dark",
-        legend={
+    layout = {
+        "template": _PLOTLY_DARK,
+        "height": 1000,
+        "title": {
+            "text": f"Explorador de Volatilidad – {ticker} - Tiempo de cálculo: {time() - start_time:.2f} segundos"
+        },
+        "legend": {
             "orientation": "v",
             "yanchor": "top",
             "y": 0.99,
             "xanchor": "left",
             "x": 1.02,
         },
-        margin={"r": 250},
-    )
-
-    fig.update_yaxes(title_text="Precio", row=1, col=1)
-    fig.update_yaxes(title_text="Retornos", row=2, col=1)
-    fig.update_yaxes(title_text="Desviación Estándar", row=3, col=1)
-    fig.update_yaxes(title_text="Rango Intercuartil", row=4, col=1)
+        "margin": {"r": 250},
+        "annotations": annotations,
+        "shapes": shapes,
+    }
+    for row, y_title in enumerate(
+        ["Precio", "Retornos", "Desviación Estándar", "Rango Intercuartil"], 1
+    ):
+        xaxis, yaxis = _axis(row)
+        layout["xaxis" + xaxis[1:]] = {
+            "type": "date",
+            "anchor": yaxis,
+            "domain": [0, 1],
+            "showticklabels": row == len(_ROW_DOMAINS),
+        }
+        if row > 1:
+            layout["xaxis" + xaxis[1:]]["matches"] = "x"
+        layout["yaxis" + yaxis[1:]] = {
+            "anchor": xaxis,
+            "domain": list(_ROW_DOMAINS[row]),
+            "title": {"text": y_title},
+        }
 
-    return fig
+    return {"data": traces, "layout": layout}
 
 
 # ---------- Dash ----------
 app = dash.Dash(
     __name__,
+    compress=True,
     external_stylesheets=[
         dbc.themes.BOOTSTRAP,
         "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css",
@@ -607,6 +833,28 @@ app.layout = dbc.Container(
                                         ],
                                         className="mb-3",
                                     ),
+                                    Div(
+                                        [
+                                            dbc.Checklist(
+                                                id="show-expanding",
+                                                options=[
+                                                    {
+                                                        "label": "Mostrar estadísticas acumuladas",
+                                                        "value": "expanding",
+                                                    }
+                                                ],
+                                                value=["expanding"],
+                                                switch=True,
+                                                className="text-light",
+                                            ),
+                                            dbc.Tooltip(
+                                                "Desactiva esta opción para omitir las curvas acumuladas (Std/IQR Acumulado) y acelerar el cálculo en rangos largos.",
+                                                target="show-expanding",
+                                                placement="right",
+                                            ),
+                                        ],
+                                        className="mb-3",
+                                    ),
                                     dbc.Button(
                                         "Calcular Volatilidad",
                                         id="calculate",
@@ -681,6 +929,7 @@ app.layout = dbc.Container(
         dcc.Store(id="last_data", storage_type="memory"),
         dcc.Store(id="last_graph_params", storage_type="memory"),
         dcc.Store(id="prices", storage_type="memory"),
+        dcc.Store(id="fig-cache", storage_type="memory"),
     ],
     fluid=True,
     className="bg-dark text-light",
@@ -752,9 +1001,12 @@ def update_last_data(n, last_data, ticker, start_date, end_date):
             True,
         )
 
+    # Raw bytes (base64) instead of Python lists: no per-element JSON objects
     updated_prices = {
-        "values": updated_prices.values.tolist(),
-        "index": updated_prices.index.tolist(),
+        "values": base64.b64encode(
+            updated_prices.to_numpy(dtype=np.float64).tobytes()
+        ).decode("ascii"),
+        "index": base64.b64encode(updated_prices.index.asi8.tobytes()).decode("ascii"),
     }
     return (
         updated_last_data,
@@ -771,17 +1023,24 @@ def update_last_data(n, last_data, ticker, start_date, end_date):
     Output("loading-calculate", "children"),
     Output("error-toast", "is_open"),
     Output("error-toast", "children"),
+    Output("fig-cache", "data"),
     Input("calculate", "n_clicks"),
     State("window", "value"),
     State("last_data", "data"),
     State("prices", "data"),
     State("last_graph_params", "data"),
+    State("fig-cache", "data"),
+    State("show-expanding", "value"),
 )
-def update_graph(n, window, last_data, prices, last_graph_params):
+def update_graph(
+    n, window, last_data, prices, last_graph_params, fig_cache, show_expanding_value
+):
     """Updates the chart with price data and the window."""
     if not n or not last_data or not prices:
         raise PreventUpdate
 
+    show_expanding = bool(show_expanding_value)
+
     if not window or not isinstance(window, (int, float)) or int(window) < 1:
         return (
             no_update,
@@ -789,6 +1048,7 @@ def update_graph(n, window, last_data, prices, last_graph_params):
             "Error: Por favor, introduce un número entero válido (mínimo 1) para la ventana.",
             False,
             no_update,
+            no_update,
         )
 
     window_int = int(window)
@@ -800,6 +1060,7 @@ def update_graph(n, window, last_data, prices, last_graph_params):
         and last_graph_params.get("ticker") == last_data["ticker"]
         and last_graph_params.get("start_date") == last_data["start_date"]
         and last_graph_params.get("end_date") == last_data["end_date"]
+        and last_graph_params.get("show_expanding") == show_expanding
     ):
         return (
             no_update,
@@ -807,30 +1068,68 @@ def update_graph(n, window, last_data, prices, last_graph_params):
             f"El gráfico ya está actualizado.\n{title}",
             False,
             no_update,
+            no_update,
+        )
+
+    # Serialized figures cached per parameter combination: revisiting one is
+    # a dict passthrough, with no stats or plotting work
+    fig_cache = fig_cache or {}
+    cache_key = "|".join(
+        (
+            last_data["ticker"],
+            last_data["start_date"],
+            last_data["end_date"],
+            str(window_int),
+            str(show_expanding),
+        )
+    )
+    if cache_key in fig_cache:
+        return (
+            {
+                "window": window_int,
+                "ticker": last_data["ticker"],
+                "start_date": last_data["start_date"],
+                "end_date": last_data["end_date"],
+                "show_expanding": show_expanding,
+            },
+            fig_cache[cache_key],
+            f"Gráfico actualizado con éxito.\n{title}",
+            False,
+            no_update,
+            no_update,
         )
 
     df_prices = pd.Series(
-        prices["values"],
-        index=pd.to_datetime(prices["index"], errors="coerce"),
-        dtype=float,
+        np.frombuffer(base64.b64decode(prices["values"]), dtype=np.float64),
+        index=pd.DatetimeIndex(
+            np.frombuffer(base64.b64decode(prices["index"]), dtype=np.int64)
+        ),
     )
 
     try:
+        fig = build_figure(
+            last_data["ticker"],
+            df_prices,
+            window_int,
+            show_expanding,
+        )
+        fig_cache[cache_key] = fig
+        while len(fig_cache) > 8:
+            # plain LRU on insertion order; oldest entry goes first
+            fig_cache.pop(next(iter(fig_cache)))
         return (
             {
                 "window": window_int,
                 "ticker": last_data["ticker"],
                 "start_date": last_data["start_date"],
                 "end_date": last_data["end_date"],
+                "show_expanding": show_expanding,
             },
-            build_figure(
-                last_data["ticker"],
-                df_prices,
-                window_int,
-            ),
+            fig,
             f"Gráfico actualizado con éxito.\n{title}",
             False,
             no_update,
+            fig_cache,
         )
     except Exception as e:
         error_message = f"Ocurrió un error inesperado durante el cálculo: {e}. Esto podría ser debido a limitaciones de la capa gratuita de Render. Por favor, intenta con un rango de fechas más corto."
@@ -840,6 +1139,7 @@ def update_graph(n, window, last_data, prices, last_graph_params):
             f"Error: {error_message}",
             True,
             error_message,
+            no_update,
         )
 
 